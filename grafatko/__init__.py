@@ -5,7 +5,7 @@ import argparse
 from importlib.machinery import SourceFileLoader
 from functools import partial
 from random import random
-from math import pi
+from math import pi, sqrt
 
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
@@ -34,6 +34,9 @@ class Canvas(QWidget):
     # the radius around which to check if the node moved when shift-selecting nodes
     mouse_toggle_radius = 0.1
 
+    # how far (in pixels) a node has to move for the graph to be redrawn
+    redraw_distance = 0.05
+
     def __init__(self, line_edit, parent, update_ui_callback):
         super().__init__(parent)
         # GRAPH
@@ -53,6 +56,21 @@ class Canvas(QWidget):
         self.line_edit = line_edit
         self.line_edit.textEdited.connect(self.line_edit_changed)
 
+        # the image the graph is drawn to, which is only redrawn when something about
+        # the graph changed (see paintEvent) and is otherwise just copied to the canvas
+        self.backbuffer: QImage = None
+        self.backbuffer_state = None
+        self.backbuffer_positions: List[Tuple[DrawableNode, Vector]] = []
+
+        # for changes that the state of the backbuffer doesn't capture (like labels)
+        self.redraw: bool = True
+
+        # the components and the connected pairs of the nodes of the graph (as indexes
+        # to its list of nodes), along with the graph and its version when they were
+        # calculated, since they're needed each frame but rarely change
+        self.structure: Tuple[Tuple, Tuple[List[List[int]], List[Tuple[int, int]]]]
+        self.structure = None
+
         # timer that runs the simulation (60 times a second... once every ~= 17ms)
         QTimer(self, interval=17, timeout=self.update).start()
 
@@ -83,42 +101,83 @@ class Canvas(QWidget):
 
         # only move the nodes when forces are enabled
         if self.forces:
-            for i, n1 in enumerate(self.graph.get_nodes()):
-                for n2 in self.graph.get_nodes()[i + 1 :]:
-                    # only apply force, if n1 and n2 are weakly connected
-                    if not self.graph.weakly_connected(n1, n2):
-                        continue
-
-                    d = n1.get_position().distance(n2.get_position())
-
-                    # if they are on top of each other, nudge one of them slightly
-                    if d == 0:
-                        n1.add_force(Vector(random(), random()))
-                        continue
-
-                    # unit vector from n1 to n2
-                    uv = (n2.get_position() - n1.get_position()).unit()
-
-                    # the size of the repel force between the two nodes
-                    fr = self.repulsion(d)
-
-                    # add a repel force to each of the nodes, in the opposite directions
-                    n1.add_force(-uv * fr)
-                    n2.add_force(uv * fr)
+            nodes = self.graph.get_nodes()
+
+            # the positions of the nodes and the forces acting on them, stored as
+            # separate lists of floats so no vectors are created for each of the pairs
+            xs = [n.get_position()[0] for n in nodes]
+            ys = [n.get_position()[1] for n in nodes]
+            fx = [0.0] * len(nodes)
+            fy = [0.0] * len(nodes)
+
+            # only nodes that are weakly connected act upon each other, so only the
+            # pairs from each of the components (as indexes to the lists) are examined
+            components, pairs = self.get_structure()
+
+            # the force functions are looked up once (instead of for each of the pairs)
+            repulsion, attraction = self.repulsion, self.attraction
+
+            for component in components:
+                for k, i in enumerate(component):
+                    x, y = xs[i], ys[i]
+
+                    # the force acting on the node is summed in local variables and only
+                    # added to the list once all of the pairs with it are examined
+                    fxi = fyi = 0.0
+
+                    for j in component[k + 1 :]:
+                        dx = xs[j] - x
+                        dy = ys[j] - y
+                        d = sqrt(dx * dx + dy * dy)
+
+                        # if they are on top of each other, nudge one of them slightly
+                        if d == 0:
+                            fxi += random()
+                            fyi += random()
+                            continue
+
+                        # the size of the repel force between the two nodes (divided by
+                        # the distance, to get the force along the unit vector)
+                        f = repulsion(d) / d
+
+                        # add the force to each of the nodes, in the opposite directions
+                        # (along the unit vector from n1 to n2)
+                        dx *= f
+                        dy *= f
+                        fxi -= dx
+                        fyi -= dy
+                        fx[j] += dx
+                        fy[j] += dy
+
+                    fx[i] += fxi
+                    fy[i] += fyi
+
+            # the pairs of connected nodes also attract each other, which is done
+            # separately for each pair (instead of checking whether each of the pairs
+            # of the nodes above is connected)
+            for i, j in pairs:
+                dx = xs[j] - xs[i]
+                dy = ys[j] - ys[i]
+                d = sqrt(dx * dx + dy * dy)
+
+                # they were already nudged above
+                if d == 0:
+                    continue
 
-                    # if they are also connected, add the attraction force
-                    # the direction does not matter -- it would look weird for directed
-                    if n1.is_adjacent_to(n2) or n2.is_adjacent_to(n1):
-                        fa = self.attraction(d)
+                f = attraction(d) / d
 
-                        n1.add_force(-uv * fa)
-                        n2.add_force(uv * fa)
+                fx[i] -= dx * f
+                fy[i] -= dy * f
+                fx[j] += dx * f
+                fy[j] += dy * f
 
+            for i, node in enumerate(nodes):
                 # root is special
-                if n1 is root:
-                    n1.clear_forces()
+                if node is root:
+                    node.clear_forces()
                 else:
-                    n1.evaluate_forces()
+                    node.add_force(Vector(fx[i], fy[i]))
+                    node.evaluate_forces()
 
         # if space is being pressed, center around the currently selected nodes
         # if there are none, center around their average
@@ -138,8 +197,33 @@ class Canvas(QWidget):
 
         super().update(*args)
 
+    def get_structure(self) -> Tuple[List[List[int]], List[Tuple[int, int]]]:
+        """Return the components of the graph and the pairs of its nodes that are
+        connected by a vertex (both as indexes to its list of nodes), only recalculating
+        them when the graph changed."""
+        key = (self.graph, self.graph.version)
+
+        if self.structure is None or self.structure[0] != key:
+            index = {n: i for i, n in enumerate(self.graph.get_nodes())}
+            components = [[index[n] for n in c] for c in self.graph.get_components()]
+
+            # the direction does not matter (it would look weird for directed graphs),
+            # so each pair is only here once
+            pairs = set()
+            for vertex in self.graph.get_vertices():
+                i, j = sorted((index[vertex[0]], index[vertex[1]]))
+
+                if i != j:
+                    pairs.add((i, j))
+
+            self.structure = (key, (components, sorted(pairs)))
+
+        return self.structure[1]
+
     def line_edit_changed(self, text):
         """Called when the line edit associated with the Canvas changed."""
+        self.redraw = True
+
         selected = self.graph.get_selected_objects()
 
         if type(selected[0]) is DrawableNode:
@@ -186,8 +270,59 @@ class Canvas(QWidget):
                 self.line_edit.setText(str(selected[0].get_weight()))
 
     def paintEvent(self, event):
-        """Paints the board."""
+        """Paints the board (only redrawing the backbuffer when it's outdated)."""
+        if self.backbuffer_outdated():
+            self.redraw_backbuffer()
+
         painter = QPainter(self)
+        painter.drawImage(0, 0, self.backbuffer)
+
+    def backbuffer_outdated(self) -> bool:
+        """Return True if the graph looks different than it did when the backbuffer was
+        last drawn."""
+        state = (
+            self.graph,
+            self.graph.version,
+            self.size(),
+            self.devicePixelRatioF(),
+            self.transformation.scale,
+            tuple(self.transformation.translation),
+            self.palette().cacheKey(),
+        )
+
+        if self.redraw or state != self.backbuffer_state:
+            self.backbuffer_state = state
+            return True
+
+        # animations change the colors of the graph each frame
+        if self.graph.animations_active():
+            return True
+
+        # the nodes could have been moved by forces, dragging, rotating...
+        distance = self.redraw_distance / self.transformation.scale
+        for node, position in self.backbuffer_positions:
+            if node.get_position().distance(position) > distance:
+                return True
+
+        return False
+
+    def redraw_backbuffer(self):
+        """Draw the graph to the backbuffer (creating it, if the size changed)."""
+        self.redraw = False
+        self.backbuffer_positions = [
+            (n, n.get_position()) for n in self.graph.get_nodes()
+        ]
+
+        ratio = self.devicePixelRatioF()
+        if self.backbuffer is None or self.backbuffer.size() != self.size() * ratio:
+            size = self.size() * ratio
+            self.backbuffer = QImage(size, QImage.Format_ARGB32_Premultiplied)
+            self.backbuffer.setDevicePixelRatio(ratio)
+
+        # clear it, so it is drawn over whatever is behind the canvas
+        self.backbuffer.fill(Qt.transparent)
+
+        painter = QPainter(self.backbuffer)
         painter.setRenderHint(QPainter.Antialiasing, True)
         palette = self.palette()
 
@@ -205,6 +340,8 @@ class Canvas(QWidget):
         # draw the graph
         self.graph.draw(painter, palette)
 
+        painter.end()
+
     def keyReleaseEvent(self, event):
         """Called when a key press is registered."""
         key = self.keyboard.released_event(event)
@@ -245,11 +382,13 @@ class Canvas(QWidget):
                 self.graph.set_root(selected[0])
 
         if key is self.keyboard.delete:
-            for node in self.graph.get_selected_nodes():
-                self.graph.remove_node(node)
+            # a batch, so the graph is only recalculated once all of them are removed
+            with self.graph.batch():
+                for node in self.graph.get_selected_nodes():
+                    self.graph.remove_node(node)
 
-            for vertex in self.graph.get_selected_vertices():
-                self.graph.remove_vertex(vertex[0], vertex[1])
+                for vertex in self.graph.get_selected_vertices():
+                    self.graph.remove_vertex(vertex[0], vertex[1])
 
         elif key is self.keyboard.shift and self.mouse.left.pressed():
             self.start_shift_dragging_nodes()
@@ -342,16 +481,19 @@ class Canvas(QWidget):
                 # if there isn't a node at the position, create a new one, connect
                 # all selected to it and select
                 pressed_node = DrawableNode(position=self.mouse.get_position())
-                self.graph.add_node(pressed_node)
 
-                for node in selected:
-                    self.graph.add_vertex(node, pressed_node)
+                with self.graph.batch():
+                    self.graph.add_node(pressed_node)
+
+                    for node in selected:
+                        self.graph.add_vertex(node, pressed_node)
 
                 self.select(pressed_node)
             else:
                 # if there is, toggle vertices from selected to it
-                for node in selected:
-                    self.graph.toggle_vertex(node, pressed_node)
+                with self.graph.batch():
+                    for node in selected:
+                        self.graph.toggle_vertex(node, pressed_node)
 
     def wheelEvent(self, event):
         """Is called when the mouse wheel is turned."""
@@ -415,9 +557,12 @@ class Canvas(QWidget):
             return
 
         try:
+            with open(path, "r") as f:
+                string = f.read()
+
             # create the graph
             new_graph = DrawableGraph.from_string(
-                open(path, "r").read(),
+                string,
                 selected_changed=self.selected_changed,
                 animation_stopped=self.update_ui_callback,
             )
@@ -442,6 +587,7 @@ class Canvas(QWidget):
                 self, "Error!", "An error occurred when importing the graph."
             )
 
+        self.redraw = True
         self.update_ui_callback()
 
     def export_graph(self):
@@ -486,6 +632,7 @@ class Canvas(QWidget):
                 self, "Error!", f"An error occurred when running the algorithm.\n\n{e}",
             )
 
+        self.redraw = True
         self.update_ui_callback()
 
 
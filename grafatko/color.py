@@ -3,7 +3,7 @@
 from __future__ import annotations
 from typing import *
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from abc import *
 from PyQt5.QtGui import *
@@ -97,8 +97,20 @@ class Pen(Colorable):
     style: Qt.PenStyle = Qt.SolidLine
     width: float = 0.1
 
+    # the last created pen (and what it was created from), since the pen is usually
+    # the same from one frame to another and creating it each time is wasteful
+    _pen: Tuple[Tuple, QPen] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     def __call__(self, palette: QPalette):
-        return QPen(self.get_color()(palette), self.width, self.style)
+        color = self.get_color()(palette)
+        key = (color.rgba(), self.width, self.style)
+
+        if self._pen is None or self._pen[0] != key:
+            self._pen = (key, QPen(color, self.width, self.style))
+
+        return self._pen[1]
 
 
 @dataclass
@@ -107,8 +119,19 @@ class Brush(Colorable):
 
     style: Qt.BrushStyle = Qt.SolidPattern
 
+    # the last created brush (see Pen)
+    _brush: Tuple[Tuple, QBrush] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     def __call__(self, palette: QPalette):
-        return QBrush(self.get_color()(palette), self.style)
+        color = self.get_color()(palette)
+        key = (color.rgba(), self.style)
+
+        if self._brush is None or self._brush[0] != key:
+            self._brush = (key, QBrush(color, self.style))
+
+        return self._brush[1]
 
     @classmethod
     def empty(cls):
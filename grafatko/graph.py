@@ -5,7 +5,9 @@ from __future__ import annotations
 from abc import *
 from ast import literal_eval
 from collections import defaultdict
-from math import radians, pi
+from contextlib import contextmanager
+from itertools import chain
+from math import radians, pi, sin, cos, sqrt, isfinite
 
 from grafatko.color import *
 from grafatko.animation import *
@@ -15,8 +17,13 @@ from grafatko.utilities import *
 class Node:
     """A class for working with nodes of a graph."""
 
+    # there can be a lot of nodes and their attributes are accessed all the time, so
+    # they're stored in slots instead of a __dict__
+    __slots__ = ("adjacent", "label")
+
     def __init__(self, label=None):
-        self.adjacent: Set[Vertex] = set()
+        # the vertices going from this node, keyed by the node they're going to
+        self.adjacent: Dict[Node, Vertex] = {}
         self.label = label
 
     def get_label(self) -> Optional[str]:
@@ -33,28 +40,31 @@ class Node:
 
     def get_adjacent_vertices(self) -> Set[Vertex]:
         """Returns a set of vertices adjacent to this one."""
-        return self.adjacent
+        return set(self.adjacent.values())
 
     def get_adjacent_nodes(self) -> Set[Node]:
         """Returns a list of nodes adjacent to this one."""
-        return {v[1] for v in self.adjacent}
+        return set(self.adjacent)
 
     def is_adjacent_to(self, node: Node) -> bool:
         """Return True if this node is adjacent to the specified node."""
-        return node in self.get_adjacent_nodes()
+        return node in self.adjacent
 
-    def _remove_adjacent_node(self, node: Node):
-        """Remove an adjacent node (if it's there)."""
-        self.adjacent = {v for v in self.adjacent if v[1] is not node}
+    def _remove_adjacent_node(self, node: Node) -> Optional[Vertex]:
+        """Remove an adjacent node (if it's there), returning the vertex to it."""
+        return self.adjacent.pop(node, None)
 
     def _add_adjacent_vertex(self, vertex: Vertex):
         """Add an adjacent vertex."""
-        self.adjacent.add(vertex)
+        self.adjacent[vertex[1]] = vertex
 
 
 class Vertex:
     """A class for representing a vertex."""
 
+    # there are even more vertices than nodes, so they're stored in slots too
+    __slots__ = ("node_from", "node_to", "weight")
+
     def __init__(self, node_from: Node, node_to: Node, weight=1):
         self.node_from = node_from
         self.node_to = node_to
@@ -107,80 +117,189 @@ class Graph:
         self.directed: bool = False
         self.weighted: bool = False
 
-        self.nodes: List[Node] = []
-        self.vertices: List[Vertex] = []
+        # the nodes and vertices are the keys of (insertion-ordered) dictionaries, so
+        # removing them is O(1); the lists returned by the getters are only rebuilt
+        # from them after they change
+        self.nodes: Dict[Node, None] = {}
+        self.vertices: Dict[Vertex, None] = {}
+        self._node_list: Optional[List[Node]] = None
+        self._vertex_list: Optional[List[Vertex]] = None
+
+        # a union-find structure of the weakly connected components of the graph
+        # adding nodes/vertices updates it in (almost) O(1), while removing them marks
+        # it as dirty, since it then has to be rebuilt (in O(n + m)) on next access
+        self.parent: Dict[Node, Node] = {}
+        self.rank: Dict[Node, int] = {}
+        self._components_dirty: bool = False
 
-        # a component array that gets recalculated on each destructive graph operation
-        # takes O(n^2) to rebuild, but O(1) to check components, so it's better for us
-        self.components: List[Set[Node]] = None
+        # incremented on each change of the graph, so its users can tell whether it
+        # changed since they last looked at it (without comparing all of it)
+        self.version: int = 0
 
-    def recalculate_components(function):
-        """A decorator for rebuilding the components of the graph."""
+        # how many batches of changes are currently being made (see batch)
+        self.batches: int = 0
+
+    def changes_version(function):
+        """A decorator for incrementing the version of the graph."""
 
         def wrapper(self, *args, **kwargs):
-            # first add/remove vertex/node/...
             function(self, *args, **kwargs)
 
-            self.components = []
+            self.version += 1
 
-            for node in self.get_nodes():
-                # the current set of nodes that we know are reachable from one another
-                component = set([node] + list(node.get_adjacent_nodes()))
+        return wrapper
 
-                i = 0
-                while i < len(self.components):
-                    if len(self.components[i].intersection(component)) != 0:
-                        component |= self.components.pop(i)
-                    else:
-                        i += 1
+    def invalidate_components(function):
+        """A decorator for marking the components of the graph as dirty."""
 
-                self.components.append(component)
+        def wrapper(self, *args, **kwargs):
+            # first remove vertex/node/...
+            function(self, *args, **kwargs)
+
+            self._mark_dirty()
 
         return wrapper
 
+    @contextmanager
+    def batch(self):
+        """A context manager for making many changes to the graph at once. Things that
+        depend on the whole graph are only recalculated after all of them are made
+        (instead of after each one)."""
+        self.batches += 1
+
+        try:
+            yield self
+        finally:
+            self.batches -= 1
+
+            if self.batches == 0:
+                self.batch_finished()
+
+    def batch_finished(self):
+        """Called after a batch of changes to the graph was made (see batch)."""
+        pass
+
+    def _mark_dirty(self):
+        """Mark the components of the graph as dirty (to be rebuilt on next access)."""
+        self._components_dirty = True
+
+    def recalculate_weakly_connected(self):
+        """Rebuild the components of the graph (in a single DFS sweep)."""
+        # the vertices of a directed graph only go one way, so the nodes pointing to
+        # each node are needed too, for the components to be weakly connected
+        incoming: Dict[Node, List[Node]] = defaultdict(list)
+        if self.is_directed():
+            for vertex in self.get_vertices():
+                incoming[vertex[1]].append(vertex[0])
+
+        self.parent = {}
+        self.rank = {}
+
+        for root in self.get_nodes():
+            if root in self.parent:
+                continue
+
+            # each of the nodes of the component points directly to its root
+            self.parent[root] = root
+            self.rank[root] = 0
+
+            stack = [root]
+            while len(stack) != 0:
+                node = stack.pop()
+
+                for adjacent in chain(node.adjacent, incoming[node]):
+                    if adjacent not in self.parent:
+                        self.parent[adjacent] = root
+                        self.rank[adjacent] = 0
+                        self.rank[root] = 1
+
+                        stack.append(adjacent)
+
+        self._components_dirty = False
+
+    def _find(self, node: Node) -> Node:
+        """Return the representative of the component of the node (halving the paths
+        to it along the way)."""
+        parent = self.parent
+
+        while parent[node] is not node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+
+        return node
+
+    def _union(self, n1: Node, n2: Node):
+        """Merge the components of the two nodes (if they are not merged already)."""
+        r1, r2 = self._find(n1), self._find(n2)
+
+        if r1 is r2:
+            return
+
+        # attach the shallower tree under the deeper one
+        if self.rank[r1] < self.rank[r2]:
+            r1, r2 = r2, r1
+
+        self.parent[r2] = r1
+
+        if self.rank[r1] == self.rank[r2]:
+            self.rank[r1] += 1
+
+    def get_components(self) -> List[Set[Node]]:
+        """Return the components of the graph, rebuilding them if they're dirty."""
+        if self._components_dirty:
+            self.recalculate_weakly_connected()
+
+        components: Dict[Node, Set[Node]] = defaultdict(set)
+        for node in self.get_nodes():
+            components[self._find(node)].add(node)
+
+        return list(components.values())
+
     def get_weakly_connected(self, *args: Sequence[Node]) -> Set[Node]:
         """Return a set of all nodes that are weakly connected to any node from the
         given sequence."""
-        nodes = set()
+        if self._components_dirty:
+            self.recalculate_weakly_connected()
 
-        for node in args:
-            for component in self.components:
-                if node in component:
-                    nodes |= component
+        roots = {self._find(node) for node in args if node in self.parent}
 
-        return nodes
+        return {node for node in self.get_nodes() if self._find(node) in roots}
 
     def weakly_connected(self, n1: Node, n2: Node) -> bool:
         """Return True if the nodes are weakly connected, else False."""
-        for component in self.components:
-            a = n1 in component
-            b = n2 in component
+        if self._components_dirty:
+            self.recalculate_weakly_connected()
+
+        # nodes that are not in the graph are not connected to anything
+        if n1 not in self.parent or n2 not in self.parent:
+            return False
 
-            if a and b:
-                return True
-            elif a or b:
-                return False
+        return self._find(n1) is self._find(n2)
 
     def is_directed(self) -> bool:
         """Return True if the graph is directed, else False."""
         return self.directed
 
+    @changes_version
     def set_directed(self, directed: bool):
         """Set, whether the graph is directed or not."""
         # if we're converting to undirected, make all current vertices go both ways
         if self.is_directed():
-            for node in self.get_nodes():
-                for neighbour in node.get_adjacent_nodes():
-                    if node is neighbour:
-                        self.remove_vertex(node, neighbour)  # no loops allowed >:C
-                    else:
-                        self.add_vertex(neighbour, node)
-
-            # also, set all weights between to nodes to equal
+            with self.batch():
+                for node in self.get_nodes():
+                    for neighbour in node.get_adjacent_nodes():
+                        if node is neighbour:
+                            self.remove_vertex(node, neighbour)  # no loops allowed >:C
+                        else:
+                            self.add_vertex(neighbour, node)
+
+            # also, set all weights between to nodes to equal (looking the vertex that
+            # goes the other way up in the adjacent of its node)
             for v1 in self.get_vertices():
-                for v2 in self.get_vertices():
-                    if v1 == (v2[1], v2[0]):
-                        v2.set_weight(v1.get_weight())
+                v2 = v1[1].adjacent.get(v1[0])
+
+                if v2 is not None:
+                    v2.set_weight(v1.get_weight())
 
         self.directed = directed
 
@@ -188,120 +307,191 @@ class Graph:
         """Return True if the graph is weighted and False otherwise."""
         return self.weighted
 
+    @changes_version
     def set_weighted(self, value: bool):
         """Set, whether the graph is weighted or not."""
         self.weighted = value
 
+    @changes_version
     def set_weight(self, vertex: Vertex, weight: float):
         """Set the weight of the given vertex (both ways, if the graph is not oriented).
         Only does so if the vertex exists."""
         vertex.set_weight(weight)
 
         if not self.is_directed():
-            # find the vertex that goes the other way
-            for v in self.get_vertices():
-                if v == (vertex[1], vertex[0]):
-                    v.set_weight(weight)
-                    break
+            # the vertex that goes the other way (from the adjacent of the other node)
+            other = vertex[1].adjacent.get(vertex[0])
+
+            if other is not None:
+                other.set_weight(weight)
 
     def get_weight(self, n1: Node, n2: Node) -> Optional[Union[int, float]]:
         """Return the weight of the specified vertex (and None if they're not connected)."""
-        for vertex in self.get_vertices():
-            if Vertex(n1, n2) == vertex:
-                return vertex.get_weight()
+        vertex = n1.adjacent.get(n2)
+
+        if vertex is not None:
+            return vertex.get_weight()
 
     def get_nodes(self) -> List[Node]:
         """Return a list of nodes of the graph."""
-        return self.nodes
+        if self._node_list is None:
+            self._node_list = list(self.nodes)
+
+        return self._node_list
 
     def get_vertices(self) -> List[Vertex]:
         """Return a list of vertices of the graph."""
-        return self.vertices
+        if self._vertex_list is None:
+            self._vertex_list = list(self.vertices)
+
+        return self._vertex_list
 
-    @recalculate_components
+    @changes_version
     def add_node(self, node: Node):
         """Add a new node to the graph."""
-        self.nodes.append(node)
+        self.nodes[node] = None
+        self._node_list = None
+
+        # the node is in a component of its own
+        self.parent[node] = node
+        self.rank[node] = 0
 
     def reorient(self):
         """Change the orientation of all vertices."""
-        # for each pair of nodes
-        for i, n1 in enumerate(self.get_nodes()):
-            for n2 in self.get_nodes()[i:]:
-                # change the direction, if there is only one
-                if bool(n1.is_adjacent_to(n2)) != bool(n2.is_adjacent_to(n1)):  # xor
-                    self.toggle_vertex(n1, n2)
-                    self.toggle_vertex(n2, n1)
+        with self.batch():
+            # for each pair of nodes
+            for i, n1 in enumerate(self.get_nodes()):
+                for n2 in self.get_nodes()[i:]:
+                    # change the direction, if there is only one (xor)
+                    if bool(n1.is_adjacent_to(n2)) != bool(n2.is_adjacent_to(n1)):
+                        self.toggle_vertex(n1, n2)
+                        self.toggle_vertex(n2, n1)
 
     def complement(self):
         """Complement the graph."""
-        # for each pair of nodes
-        for i, n1 in enumerate(self.get_nodes()):
-            for n2 in self.get_nodes()[i:]:
-                self.toggle_vertex(n1, n2)
-
-                # also toggle the other way, if it's directed
-                # node that I didn't deliberately put 'and n1 is not n2' here, since
-                # they're special and we usually don't want them
-                if self.is_directed():
-                    self.toggle_vertex(n2, n1)
-
-    @recalculate_components
+        # the toggles don't change the nodes or whether the graph is directed
+        nodes = self.get_nodes()
+        directed = self.is_directed()
+
+        with self.batch():
+            # for each pair of nodes (by their indexes, so each pair is here once)
+            for i, n1 in enumerate(nodes):
+                for n2 in nodes[i:]:
+                    self.toggle_vertex(n1, n2)
+
+                    # also toggle the other way, if it's directed
+                    # node that I didn't deliberately put 'and n1 is not n2' here,
+                    # since they're special and we usually don't want them
+                    if directed:
+                        self.toggle_vertex(n2, n1)
+
+    @changes_version
+    @invalidate_components
     def remove_node(self, node: Node):
         """Removes the node from the graph."""
-        # remove it from the list of nodes
-        self.nodes.remove(node)
-
-        # remove all vertices that contain it
-        i = 0
-        while i < len(self.vertices):
-            v = self.vertices[i]
-            if node is v[0] or node is v[1]:
-                del self.vertices[i]
-            else:
-                i += 1
+        # remove it from the nodes
+        del self.nodes[node]
+        self._node_list = None
+
+        # remove all vertices that contain it (and the node from the adjacent of the
+        # nodes that they go from, which are the only ones that have it there)
+        # in undirected graphs, these are its vertices and their reverses, while in
+        # directed graphs, all vertices have to be checked for the ones going to it
+        if not self.is_directed():
+            vertices = [
+                v
+                for vertex in node.adjacent.values()
+                for v in (vertex, vertex[1].adjacent[node])
+            ]
+        else:
+            vertices = [v for v in self.vertices if node is v[0] or node is v[1]]
+
+        for v in vertices:
+            v[0]._remove_adjacent_node(node)
+            del self.vertices[v]
 
-        # remove this node from all nodes' adjacent
-        for other in self.get_nodes():
-            other._remove_adjacent_node(node)
+        self._vertex_list = None
 
-    @recalculate_components
+    @changes_version
     def add_vertex(self, n1: Node, n2: Node, weight: Optional[float] = 1, **kwargs):
         """Adds a vertex from node n1 to node n2 (and vice versa, if it's not directed).
         Only does so if the given vertex doesn't already exist and can be added (if, for
         example the graph is not directed and the node wants to point to itself)."""
+        directed = self.is_directed()
+
         # prevent loops in undirected graphs and duplication
-        if (n1 is n2 and not self.is_directed()) or n1.is_adjacent_to(n2):
+        if (n1 is n2 and not directed) or n2 in n1.adjacent:
             return
 
         # create the object, adding it to vertices
         vertex = self.vertex_class(n1, n2, weight, **kwargs)
-        self.vertices.append(vertex)
+        self.vertices[vertex] = None
         n1._add_adjacent_vertex(vertex)
 
         # add it one/both ways, depending on whether the graph is directed or not
-        if not self.is_directed():
+        if not directed:
             vertex = self.vertex_class(n2, n1, weight, **kwargs)
-            self.vertices.append(vertex)
+            self.vertices[vertex] = None
             n2._add_adjacent_vertex(vertex)
 
-    @recalculate_components
+        self._vertex_list = None
+
+        # the nodes are now in the same component (unless it's rebuilt later anyway)
+        if not self._components_dirty:
+            self._union(n1, n2)
+
+    @changes_version
     def remove_vertex(self, n1: Node, n2: Node):
         """Removes a vertex from node n1 to node n2 (and vice versa, if it's not 
         directed). Only does so if the given vertex exists."""
         # remove it one-way if the graph is directed and both if it's not
-        i = 0
-        while i < len(self.vertices):
-            v = self.vertices[i]
-            if (n1, n2) == v or (not self.is_directed() and (n2, n1) == v):
-                del self.vertices[i]
-            else:
-                i += 1
+        vertex = n1._remove_adjacent_node(n2)
 
-        # see above comment
-        n1._remove_adjacent_node(n2)
-        if not self.is_directed():
-            n2._remove_adjacent_node(n1)
+        if vertex is None:
+            return
+
+        reverse = n2._remove_adjacent_node(n1) if not self.is_directed() else None
+
+        # remove the vertex objects from the vertices (they're hashed by identity)
+        del self.vertices[vertex]
+
+        if reverse is not None:
+            del self.vertices[reverse]
+
+        self._vertex_list = None
+
+        # the components only have to be rebuilt if the nodes are no longer connected
+        # (when many vertices are removed, it's faster to rebuild them once instead)
+        if self.batches != 0 or not self._still_connected(n1, n2):
+            self._mark_dirty()
+
+    def _still_connected(self, n1: Node, n2: Node) -> bool:
+        """Return True if the nodes are still weakly connected after removing a vertex
+        between them (so their components didn't change)."""
+        if n1 is n2:
+            return True
+
+        # the nodes of a directed graph don't know the vertices that point to them, so
+        # only the vertex that goes the other way is checked
+        if self.is_directed():
+            return n2.is_adjacent_to(n1)
+
+        # search from both of the nodes at once -- either the searches meet, or the
+        # one in the smaller of the (now two) components runs out of nodes first
+        seen = ({n1}, {n2})
+        stacks = ([n1], [n2])
+
+        while len(stacks[0]) != 0 and len(stacks[1]) != 0:
+            for i in (0, 1):
+                for adjacent in stacks[i].pop().adjacent:
+                    if adjacent in seen[1 - i]:
+                        return True
+
+                    if adjacent not in seen[i]:
+                        seen[i].add(adjacent)
+                        stacks[i].append(adjacent)
+
+        return False
 
     def toggle_vertex(self, n1: Node, n2: Node):
         """Toggles a connection between two nodes."""
@@ -313,111 +503,131 @@ class Graph:
     @classmethod
     def from_string(cls, string: str, *args, **kwargs) -> type(cls):
         """Generates the graph from a given string."""
-        graph = None
-        node_dictionary = {}
+        # the lines of the graph (without blank lines and comments)
+        lines = [
+            line
+            for line in map(str.strip, string.splitlines())
+            if line and line[0] != "#"
+        ]
 
-        # add each of the nodes of the given line to the graph
-        for line in filter(lambda x: len(x) != 0, string.splitlines()):
-            parts = line.strip().split()
+        if len(lines) == 0:
+            return None
 
-            # initialize the graph from the first line (if it hasn't been done yet)
-            if graph is None:
-                directed = parts[1] in ("->", "<-")
-                weighted = len(parts) == 3 + directed
+        # whether the graph is directed/weighted is decided by the first line
+        parts = lines[0].split()
+        directed = parts[1] in ("->", "<-")
+        weighted = len(parts) == 3 + directed
 
-                graph = cls(*args, **kwargs)
-                graph.set_directed(directed)
-                graph.set_weighted(weighted)
+        # the formats are either 'A B' or 'A <something> B'
+        # if weight is present, the formats are:
+        # - 'A B num' for undirected graphs
+        # - 'A <something> B num' for directed graphs
+        second, weight_index = 1 + directed, 2 + directed
 
-            # the formats are either 'A B' or 'A <something> B'
-            node_names = (parts[0], parts[1 + directed])
+        # the labels of the nodes (in the order of appearance) and the vertices between
+        # them, parsed first so the graph can be built in one go afterwards
+        labels: Dict[str, None] = {}
+        vertices: List[Tuple[str, str, Union[int, float]]] = []
 
-            # if weight is present, the formats are:
-            # - 'A B num' for undirected graphs
-            # - 'A <something> B num' for directed graphs
-            weight = 0 if not weighted else literal_eval(parts[2 + directed])
+        for line in lines:
+            parts = line.split()
 
-            # create node objects for each of the names (if it hasn't been done yet)
-            for name in node_names:
-                if name not in node_dictionary:
-                    # add it to graph with default values
-                    node_dictionary[name] = cls.node_class(label=name)
-                    graph.add_node(node_dictionary[name])
+            n1, n2 = parts[0], parts[second]
+            weight = 0 if not weighted else cls.__parse_weight(parts[weight_index])
 
-            # get the node objects from the names
-            n1, n2 = node_dictionary[node_names[0]], node_dictionary[node_names[1]]
+            labels[n1] = labels[n2] = None
 
             # possibly switch places for a reverse arrow
             if parts[1] == "<-":
                 n1, n2 = n2, n1
 
-            # add the vertex
-            graph.add_vertex(n1, n2, weight)
+            vertices.append((n1, n2, weight))
+
+        graph = cls(*args, **kwargs)
+        graph.set_directed(directed)
+        graph.set_weighted(weighted)
+
+        with graph.batch():
+            # create node objects for each of the names and add them to the graph
+            node_dictionary = {label: cls.node_class(label=label) for label in labels}
+            for node in node_dictionary.values():
+                graph.add_node(node)
+
+            # add the vertices between them
+            for n1, n2, weight in vertices:
+                graph.add_vertex(node_dictionary[n1], node_dictionary[n2], weight)
 
         return graph
 
+    @staticmethod
+    def __parse_weight(string: str) -> Union[int, float]:
+        """Parse the weight of a vertex. Tries int and float first, since they're much
+        faster than literal_eval (which parses the weight as a Python expression)."""
+        try:
+            return int(string)
+        except ValueError:
+            try:
+                weight = float(string)
+            except ValueError:
+                return literal_eval(string)
+
+            # unlike literal_eval, float also parses inf and nan, which are not valid
+            if not isfinite(weight):
+                raise ValueError(f"Invalid weight '{string}'.")
+
+            return weight
+
     def to_string(self) -> str:
         """Exports the graph, returning the string."""
-        string = ""
+        directed = self.is_directed()
+        weighted = self.is_weighted()
 
-        counter = 0  # for naming nodes that don't have a label
-        added = {}
+        # the labels of the nodes, numbering the nodes that don't have one
+        labels: Dict[Node, str] = {}
+        counter = 0
 
-        # for each vertex
-        for vertex in self.get_vertices():
-            n1 = vertex[0]
-            n2 = vertex[1]
+        # the indexes of the nodes, so a vertex of an undirected graph is only written
+        # once (from the node with the lower index)
+        index: Dict[Node, int] = {}
 
-            # only add a vertex from an undirected graph once
-            if not self.is_directed() and id(n1) > id(n2):
-                continue
+        for i, node in enumerate(self.get_nodes()):
+            label = node.get_label()
 
-            n1_label = n1.get_label()
-            if n1_label is None:
-                if n1 not in added:
-                    counter += 1
-                    added[n1] = str(counter)
-                n1_label = added[n1]
-
-            n2_label = n2.get_label()
-            if n2_label is None:
-                if n2 not in added:
-                    counter += 1
-                    added[n2] = str(counter)
-                n2_label = added[n2]
-
-            if n1.is_adjacent_to(n2):
-                string += (
-                    n1_label
-                    + (" -> " if self.is_directed() else " ")
-                    + n2_label
-                    + (
-                        (" " + str(self.get_weight(n1, n2)))
-                        if self.is_weighted()
-                        else ""
-                    )
-                    + "\n"
-                )
-
-            if n2.is_adjacent_to(n1) and self.is_directed():
-                string += (
-                    n1_label
-                    + (" <- " if self.is_directed() else " ")
-                    + n2_label
-                    + (
-                        (" " + str(self.get_weight(n2, n1)))
-                        if self.is_weighted()
-                        else ""
+            if label is None:
+                counter += 1
+                label = str(counter)
+
+            labels[node] = label
+            index[node] = i
+
+        # collect the lines in a list and join them at the end, since repeated string
+        # concatenation is quadratic in the length of the output
+        lines = []
+        separator = " -> " if directed else " "
+
+        # for each vertex (going through the adjacent vertices of each of the nodes)
+        for n1 in self.get_nodes():
+            label, i = labels[n1], index[n1]
+
+            for n2, vertex in n1.adjacent.items():
+                if not directed and i > index[n2]:
+                    continue
+
+                if weighted:
+                    lines.append(
+                        f"{label}{separator}{labels[n2]} {vertex.get_weight()}\n"
                     )
-                    + "\n"
-                )
+                else:
+                    lines.append(f"{label}{separator}{labels[n2]}\n")
 
-        return string
+        return "".join(lines)
 
 
 class Drawable(ABC):
     """Something that can be drawn on the PyQt5 canvas."""
 
+    __slots__ = ()  # so the classes that are drawable can have __slots__
+
     @abstractmethod
     def draw(self, painter: QPainter, palette: QPalette, *args, **kwargs):
         """Draws the object on the canvas. Takes the painter to paint on and the palette
@@ -428,6 +638,8 @@ class Drawable(ABC):
 class Paintable:
     """Has a brush and a pen to be drawn on the painter."""
 
+    __slots__ = ()  # see Drawable (the attributes are in the slots of the subclass)
+
     def __init__(self, pen: Pen = None, brush: Brush = None):
         self.pen = pen or Pen()
         self.brush = brush or Brush()
@@ -451,6 +663,8 @@ class Paintable:
 class Selectable:
     """Something that can be selected."""
 
+    __slots__ = ()  # see Paintable
+
     def __init__(self):
         self.selected = False
 
@@ -471,10 +685,30 @@ class Selectable:
 
 
 class DrawableNode(Drawable, Paintable, Selectable, Node):
+    __slots__ = (
+        "position",
+        "tick",
+        "grid",
+        "force",
+        "drag",
+        "pen",
+        "brush",
+        "selected",
+    )
+
     def __init__(self, *args, position=Vector(0, 0), **kwargs):
         self.position: Vector = position
 
-        self.forces: List[Vector] = []
+        # incremented each time the node moves, so things calculated from its position
+        # can tell whether it changed without comparing the positions
+        self.tick: int = 0
+
+        # the grid of the graph that the node is in (updated when the node moves)
+        self.grid: Optional[Grid] = None
+
+        # the components of the sum of the forces acting on the node (None if there are
+        # none), summed as floats so no vectors are created when adding them
+        self.force: Optional[Tuple[float, float]] = None
 
         # for information about being dragged
         # at that point, no forces act on it
@@ -501,7 +735,15 @@ class DrawableNode(Drawable, Paintable, Selectable, Node):
         if override_drag and self.is_dragged():
             self.drag += self.position - position
         else:
-            self.position = position - (self.drag or Vector(0, 0))
+            self.__move(position - (self.drag or Vector(0, 0)))
+
+    def __move(self, position: Vector):
+        """Move the node to the position, updating the grid it's in."""
+        self.position = position
+        self.tick += 1
+
+        if self.grid is not None:
+            self.grid.update(self, position)
 
     def start_drag(self, mouse_position: Vector):
         """Start dragging the node, setting its drag offset from the mouse."""
@@ -516,21 +758,27 @@ class DrawableNode(Drawable, Paintable, Selectable, Node):
         return self.drag is not None
 
     def add_force(self, force: Vector):
-        """Adds a force that is acting upon the node to the force list."""
-        self.forces.append(force)
+        """Adds a force that is acting upon the node (to the sum of its forces)."""
+        x, y = force
+
+        if self.force is None:
+            self.force = (x, y)
+        else:
+            self.force = (self.force[0] + x, self.force[1] + y)
 
     def evaluate_forces(self):
         """Evaluates all of the forces acting upon the node and moves it accordingly.
         Node that they are only applied if the note is not being dragged."""
-        while len(self.forces) != 0:
-            force = self.forces.pop()
+        force, self.force = self.force, None
 
-            if not self.is_dragged():
-                self.position += force
+        # only move it if some forces were actually applied
+        if force is not None and not self.is_dragged():
+            x, y = self.position
+            self.__move(Vector(x + force[0], y + force[1]))
 
     def clear_forces(self):
         """Clear all of the forces from the node."""
-        self.forces = []
+        self.force = None
 
     def draw(self, painter: QPainter, palette: QPalette, draw_label=False):
         painter.setBrush(self.brush(palette))
@@ -574,15 +822,57 @@ class DrawableNode(Drawable, Paintable, Selectable, Node):
 
 
 class DrawableVertex(Drawable, Paintable, Selectable, Vertex):
+    __slots__ = (
+        "font",
+        "tip_brush",
+        "geometry",
+        "positions",
+        "weight_box",
+        "pen",
+        "brush",
+        "selected",
+    )
+
     arrowhead_size: Final[float] = 0.5  # how big is the head triangle
     arrow_separation: Final[float] = pi / 7  # how far apart are two-way vertices
     loop_arrowhead_angle: Final[float] = -30.0  # an angle for the head in a loop
 
+    # the direction of the head of a loop and the cosine/sine of the angle between the
+    # sides of a head and the vertex, since they're the same for all vertices
+    loop_arrowhead_direction: Final[Vector] = Vector(0, 1).rotated(
+        radians(loop_arrowhead_angle)
+    )
+    arrowhead_cos: Final[float] = cos(radians(30))
+    arrowhead_sin: Final[float] = sin(radians(30))
+
+    # the cosine/sine of the separation of two-way vertices, for the same reason
+    arrow_separation_cos: Final[float] = cos(arrow_separation)
+    arrow_separation_sin: Final[float] = sin(arrow_separation)
+
+    # the distance from the center of the node to the side of the ellipse that is
+    # drawn to symbolize the loop (where its weight is drawn)
+    loop_weight_offset: Final[Vector] = Vector(0.5, 1) + Vector(0.5, 0).rotated(
+        radians(45)
+    )
+
     text_scale: Final[float] = 0.04  # the constant by which to scale down the font
 
     def __init__(self, *args, **kwargs):
         self.font: QFont = None  # the font that is used to draw the weights
 
+        # the brush of the tip of the arrow (which has the color of the pen)
+        self.tip_brush = Brush()
+
+        # the shapes that the vertex is drawn with and its starting and ending
+        # positions, along with what they were calculated from (see __get_key), since
+        # they only change when the nodes of the vertex move
+        self.geometry: Tuple[Tuple, Union[QLineF, QRectF], Optional[QPolygonF]] = None
+        self.positions: Tuple[Tuple, Tuple[Vector, Vector]] = None
+
+        # the box of the weight, which is needed more than once per frame (when
+        # drawing it and checking whether it's visible), along with its key
+        self.weight_box: Tuple[Tuple, QRectF] = None
+
         Paintable.__init__(self)
         Selectable.__init__(self)
         Vertex.__init__(self, *args, **kwargs)
@@ -590,57 +880,115 @@ class DrawableVertex(Drawable, Paintable, Selectable, Vertex):
     def draw(
         self, painter: QPainter, palette: QPalette, directed: bool, weighted: bool
     ):
-        """Also takes, whether the graph is directed or not."""
-        self.font = painter.font()
+        """Also takes, whether the graph is directed or not. The vertex is drawn the
+        same way the vertices of a graph are (see draw_batched)."""
+        self.draw_batched([self], painter, palette, directed)
 
-        painter.setPen(self.pen(palette))
-        painter.setBrush(self.brush(palette))
+        if weighted:
+            self.draw_weight(painter, palette, directed)
+
+    @staticmethod
+    def draw_batched(
+        vertices: Iterable[DrawableVertex],
+        painter: QPainter,
+        palette: QPalette,
+        directed: bool,
+        visible: Optional[QRectF] = None,
+    ):
+        """Draw the lines (and the tips, if the graph is directed) of the vertices.
+        Vertices with the same pen are drawn together in a single call, since changing
+        the pen of the painter for each of the vertices is slow. If visible is given,
+        only the vertices in it are drawn."""
+        font = painter.font()
+
+        # the pens, along with the lines and the tips that are drawn with them and the
+        # brush that the tips are filled with
+        batches: List[Tuple[QPen, List[QLineF], QPainterPath, QBrush]] = []
+
+        for vertex in vertices:
+            vertex.font = font
+
+            shape, tip = vertex._get_geometry(directed)
+
+            # skip the vertices whose bounding box is not visible (the tips are
+            # close enough to the lines for the margin to contain them)
+            if visible is not None:
+                if type(shape) is QLineF:
+                    x1, x2 = sorted((shape.x1(), shape.x2()))
+                    y1, y2 = sorted((shape.y1(), shape.y2()))
+                else:
+                    x1, y1, x2, y2 = shape.getCoords()
 
-        # special case for a loop
-        if self.is_loop():
-            painter.setBrush(Brush.empty()(palette))
+                if (
+                    x2 < visible.left()
+                    or x1 > visible.right()
+                    or y2 < visible.top()
+                    or y1 > visible.bottom()
+                ):
+                    continue
 
-            # draw the ellipse that symbolizes a loop
-            center = self[0].get_position() - Vector(0.5, 1)
-            painter.drawEllipse(QPointF(*center), 0.5, 0.5)
+            pen = vertex.pen(palette)
 
-            # draw the head of the loop arrow
-            head_direction = Vector(0, 1).rotated(radians(self.loop_arrowhead_angle))
-            self.__draw_tip(center + Vector(0.5, 0), head_direction, painter, palette)
-        else:
-            start, end = self.__get_position(directed)
+            # there are usually only a few different pens, so a linear search is fine
+            for batch in batches:
+                if batch[0] == pen:
+                    break
+            else:
+                # the tips have the color of the pen (the brush of the first vertex of
+                # the batch is used, which is cached while its color doesn't change)
+                vertex.tip_brush.set_color(vertex.pen.get_color())
+
+                batch = (pen, [], QPainterPath(), vertex.tip_brush(palette))
+                batch[2].setFillRule(Qt.WindingFill)  # so overlapping tips don't cancel
+                batches.append(batch)
+
+            # loops are drawn as ellipses, which are rare enough to draw one by one
+            if vertex.is_loop():
+                painter.setPen(pen)
+                painter.setBrush(Brush.empty()(palette))
+                painter.drawEllipse(shape)
+            else:
+                batch[1].append(shape)
 
-            # draw the line
-            painter.drawLine(QPointF(*start), QPointF(*end))
+            if tip is not None:
+                batch[2].addPolygon(tip)
+                batch[2].closeSubpath()
 
-            # draw the head of a directed arrow, which is an equilateral triangle
-            if directed:
-                self.__draw_tip(end, end - start, painter, palette)
+        for pen, lines, tips, brush in batches:
+            painter.setPen(pen)
+            painter.drawLines(lines)
 
-        # draw the weight
-        if weighted:
-            painter.setBrush(self.brush(palette))
-            painter.save()
+            if not tips.isEmpty():
+                painter.setBrush(brush)
+                painter.drawPath(tips)
+
+    def draw_weight(self, painter: QPainter, palette: QPalette, directed: bool):
+        """Draw the weight of the vertex (in a box in the middle of it)."""
+        self.font = painter.font()
 
-            # draw the bounding box
-            rect = self._get_weight_box(directed)
-            painter.drawRect(rect)
+        painter.setPen(self.pen(palette))
+        painter.setBrush(self.brush(palette))
+        painter.save()
 
-            scale = self.text_scale
+        # draw the bounding box
+        rect = self._get_weight_box(directed)
+        painter.drawRect(rect)
 
-            # translate to top left and scale down to draw the actual text
-            painter.translate(rect.topLeft())
-            painter.scale(scale, scale)
+        scale = self.text_scale
 
-            painter.setPen(self.get_font_color()(palette))
+        # translate to top left and scale down to draw the actual text
+        painter.translate(rect.topLeft())
+        painter.scale(scale, scale)
 
-            painter.drawText(
-                QRectF(0, 0, rect.width() / scale, rect.height() / scale),
-                Qt.AlignCenter,
-                str(self.get_weight()),
-            )
+        painter.setPen(self.get_font_color()(palette))
 
-            painter.restore()
+        painter.drawText(
+            QRectF(0, 0, rect.width() / scale, rect.height() / scale),
+            Qt.AlignCenter,
+            str(self.get_weight()),
+        )
+
+        painter.restore()
 
     def set_color(self, color: ColorGenerating):
         self.brush.set_color(color)
@@ -649,17 +997,24 @@ class DrawableVertex(Drawable, Paintable, Selectable, Vertex):
         return self.brush.get_color()
 
     def _get_weight_box(self, directed) -> QRectF:
-        """Get the rectangle that the weight of n1->n2 vertex will be drawn in."""
+        """Get the rectangle that the weight of n1->n2 vertex will be drawn in (only
+        recalculating it when the vertex moves, or its weight or font change)."""
+        key = (self.__get_key(directed), self.get_weight(), self.font)
+
+        if self.weight_box is None or self.weight_box[0] != key:
+            self.weight_box = (key, self.__calculate_weight_box(directed))
+
+        return self.weight_box[1]
+
+    def __calculate_weight_box(self, directed) -> QRectF:
+        """Calculate the rectangle that the weight of the vertex will be drawn in."""
         # get the rectangle that bounds the text (according to the current font metric)
         metrics = QFontMetrics(self.font)
         r = metrics.boundingRect(str(self.get_weight()))
 
         # get the mid point of the weight box, depending on whether it's a loop or not
         if self.is_loop():
-            # the distance from the center of the node to the side of the ellipse that
-            # is drawn to symbolize the loop
-            offset = Vector(0.5, 1) + Vector(0.5, 0).rotated(radians(45))
-            mid = self.__get_position()[0] - offset
+            mid = self.__get_position()[0] - self.loop_weight_offset
         else:
             mid = Vector.average(self.__get_position(directed))
 
@@ -671,47 +1026,108 @@ class DrawableVertex(Drawable, Paintable, Selectable, Vertex):
         size = Vector(width, height) * self.text_scale
         return QRectF(*(mid - size / 2), *size)
 
-    def __draw_tip(
-        self, position: Vector, direction: Vector, painter: QPainter, palette: QPalette
-    ):
-        """Draw the tip of the vertex (as a triangle)."""
-        uv = direction.unit()
-
-        # the brush color is given by the current pen
-        painter.setBrush(Brush(self.pen.get_color())(palette))
-        painter.drawPolygon(
-            QPointF(*position),
-            QPointF(*(position + (-uv).rotated(radians(30)) * self.arrowhead_size)),
-            QPointF(*(position + (-uv).rotated(radians(-30)) * self.arrowhead_size)),
+    def _get_geometry(
+        self, directed: bool
+    ) -> Tuple[Union[QLineF, QRectF], Optional[QPolygonF]]:
+        """Return the line of the vertex (or the rectangle of the ellipse, if it's a
+        loop) and the triangle of its tip (if the graph is directed). They're only
+        recalculated when the nodes of the vertex move."""
+        key = self.__get_key(directed)
+
+        if self.geometry is None or self.geometry[0] != key:
+            tip = None
+
+            # special case for a loop
+            if self.is_loop():
+                # the ellipse that symbolizes a loop
+                center = self[0].get_position() - Vector(0.5, 1)
+                shape = QRectF(*(center - Vector(0.5, 0.5)), 1, 1)
+
+                # the head of the loop arrow
+                direction = self.loop_arrowhead_direction
+                tip = self.__get_tip(center + Vector(0.5, 0), direction)
+            else:
+                start, end = self.__get_position(directed)
+                shape = QLineF(QPointF(*start), QPointF(*end))
+
+                # the head of a directed arrow, which is an equilateral triangle
+                if directed:
+                    tip = self.__get_tip(end, end - start)
+
+            self.geometry = (key, shape, tip)
+
+        return self.geometry[1], self.geometry[2]
+
+    def __get_tip(self, position: Vector, direction: Vector) -> QPolygonF:
+        """Return the tip of the vertex (as a triangle)."""
+        # the vector from the position back along the direction of the vertex
+        dx, dy = direction
+        scale = -self.arrowhead_size / sqrt(dx * dx + dy * dy)
+        x, y = dx * scale, dy * scale
+
+        # the vector rotated by 30 degrees both ways (which gives the other two points)
+        c, s = self.arrowhead_cos, self.arrowhead_sin
+        px, py = position
+
+        return QPolygonF(
+            [
+                QPointF(px, py),
+                QPointF(px + (x * c - y * s), py + (x * s + y * c)),
+                QPointF(px + (x * c + y * s), py + (y * c - x * s)),
+            ]
+        )
+
+    def __get_key(self, directed: bool) -> Tuple:
+        """Return what the geometry of the vertex is calculated from: the ticks of its
+        nodes (which change when they move), and whether it's drawn as a directed
+        vertex that has one going the other way."""
+        return (
+            self[0].tick,
+            self[1].tick,
+            directed,
+            directed and self[0] in self[1].adjacent,
         )
 
     def __get_position(self, directed: bool = False) -> Tuple[Vector, Vector]:
-        """Return the starting and ending position of the vertex on the screen."""
+        """Return the starting and ending position of the vertex on the screen (only
+        recalculating them when the nodes of the vertex move)."""
+        key = self.__get_key(directed)
+
+        if self.positions is None or self.positions[0] != key:
+            self.positions = (key, self.__calculate_position(directed))
+
+        return self.positions[1]
+
+    def __calculate_position(self, directed: bool) -> Tuple[Vector, Vector]:
+        """Calculate the starting and ending position of the vertex on the screen."""
         # special case for a loop
         if self.is_loop():
             return (self[0].get_position(), self[1].get_position())
 
-        # positions of the nodes
-        from_pos = Vector(*self[0].get_position())
-        to_pos = Vector(*self[1].get_position())
+        # positions of the nodes (the calculations are done on their components, since
+        # they're done for each vertex every time its nodes move)
+        fx, fy = self[0].get_position()
+        tx, ty = self[1].get_position()
 
-        if to_pos == from_pos:
-            return to_pos, to_pos
+        if fx == tx and fy == ty:
+            return Vector(tx, ty), Vector(tx, ty)
 
         # unit vector from n1 to n2
-        uv = (to_pos - from_pos).unit()
-
-        # start and end of the vertex to be drawn
-        start = from_pos + uv
-        end = to_pos - uv
+        dx, dy = tx - fx, ty - fy
+        length = sqrt(dx * dx + dy * dy)
+        ux, uy = dx / length, dy / length
 
         # if the graph is directed and a vertex exists that goes the other way, we
-        # have to move the start end end so the vertexes don't overlap
-        if directed and self[1].is_adjacent_to(self[0]):
-            start = start.rotated(self.arrow_separation, from_pos)
-            end = end.rotated(-self.arrow_separation, to_pos)
+        # have to rotate the start end end so the vertexes don't overlap
+        if directed and self[0] in self[1].adjacent:
+            c, s = self.arrow_separation_cos, self.arrow_separation_sin
+            return (
+                Vector(fx + (ux * c - uy * s), fy + (ux * s + uy * c)),
+                Vector(tx - (ux * c + uy * s), ty - (uy * c - ux * s)),
+            )
 
-        return start, end
+        # start and end of the vertex to be drawn
+        return Vector(fx + ux, fy + uy), Vector(tx - ux, ty - uy)
 
 
 class DrawableGraph(Drawable, Graph):
@@ -720,6 +1136,10 @@ class DrawableGraph(Drawable, Graph):
     vertex_class = DrawableVertex
     node_class = DrawableNode
 
+    # how far outside of the visible part of the painter are the nodes and vertices
+    # still drawn (so the parts of them that are inside of it are drawn too)
+    visibility_margin: Final[float] = 2
+
     def __init__(
         self,
         *args,
@@ -747,6 +1167,10 @@ class DrawableGraph(Drawable, Graph):
 
         self.default_duration = 1000
 
+        # a grid of the nodes, for quickly finding the node at a position (the nodes
+        # have a radius of 1, so any node at a position is in the cells around it)
+        self.grid = Grid(2)
+
         Graph.__init__(self, *args, **kwargs)
 
     def draw(self, painter: QPainter, palette: QPalette):
@@ -779,13 +1203,39 @@ class DrawableGraph(Drawable, Graph):
         if animation_count != 0 and len(self.animations) == 0:
             self.animation_stopped()
 
-        # first, draw all vertices
-        for vertex in self.get_vertices():
-            vertex.draw(painter, palette, self.is_directed(), self.is_weighted())
+        # the visible part of the painter (if it's clipped), so the nodes and vertices
+        # that are outside of it don't have to be drawn
+        visible = None
+        if painter.hasClipping():
+            m = self.visibility_margin
+            visible = painter.clipBoundingRect().adjusted(-m, -m, m, m)
+
+        # first, draw all vertices and then all of their weights (so the weight boxes
+        # are on top of the lines of all vertices, not only the ones drawn before them)
+        directed = self.is_directed()
+        self.vertex_class.draw_batched(
+            self.get_vertices(), painter, palette, directed, visible
+        )
+
+        if self.is_weighted():
+            self.__draw_weights(painter, palette, visible, directed)
 
         # then, draw all nodes
         for node in self.get_nodes():
-            node.draw(painter, palette, self.show_labels)
+            if visible is None or visible.contains(*node.get_position()):
+                node.draw(painter, palette, self.show_labels)
+
+    def __draw_weights(
+        self,
+        painter: QPainter,
+        palette: QPalette,
+        visible: Optional[QRectF],
+        directed: bool,
+    ):
+        """Draw the weights of the vertices (that are visible)."""
+        for vertex in self.get_vertices():
+            if visible is None or visible.intersects(vertex._get_weight_box(directed)):
+                vertex.draw_weight(painter, palette, directed)
 
     def change_color(
         self, obj: Union[DrawableNode, DrawableVertex], c: Color, **kwargs
@@ -819,6 +1269,7 @@ class DrawableGraph(Drawable, Graph):
         else:
             self.select(obj)
 
+    @Graph.changes_version
     def __change_selected_value(self, obj, value):
         obj.set_selected(value)
 
@@ -844,6 +1295,7 @@ class DrawableGraph(Drawable, Graph):
         """Return a list of nodes that are currently being dragged."""
         return [n for n in self.get_nodes() if n.is_dragged()]
 
+    @Graph.changes_version
     def set_show_labels(self, value: bool):
         """Whether to show the node labels or not."""
         self.show_labels = value
@@ -856,32 +1308,42 @@ class DrawableGraph(Drawable, Graph):
             # first add/remove vertex/node/whatever
             function(self, *args, **kwargs)
 
-            self.distance_from_root = {}
+            # when a batch of changes is being made, it's recalculated after it's done
+            if self.batches == 0:
+                self.__calculate_distance_from_root()
 
-            # don't do anything if the root
-            if self.get_root() is None:
-                return
+        return wrapper
 
-            # else run the BFS to calculate the distances
-            queue = [(self.root, 1)]
-            closed = set()
-            self.distance_from_root[0] = [self.root]
+    def batch_finished(self):
+        self.__calculate_distance_from_root()
 
-            while len(queue) != 0:
-                current, distance = queue.pop(0)
+    def __calculate_distance_from_root(self):
+        """Run a BFS from the root node, storing the nodes at each of the distances."""
+        self.distance_from_root = {}
 
-                for adjacent in current.get_adjacent_nodes():
-                    if adjacent not in closed:
-                        if distance not in self.distance_from_root:
-                            self.distance_from_root[distance] = []
+        # don't do anything if there is no root
+        if self.get_root() is None:
+            return
 
-                        queue.append((adjacent, distance + 1))
-                        self.distance_from_root[distance].append(adjacent)
+        # else run the BFS to calculate the distances
+        queue = [(self.root, 1)]
+        closed = set()
+        self.distance_from_root[0] = [self.root]
 
-                closed.add(current)
+        while len(queue) != 0:
+            current, distance = queue.pop(0)
 
-        return wrapper
+            for adjacent in current.get_adjacent_nodes():
+                if adjacent not in closed:
+                    if distance not in self.distance_from_root:
+                        self.distance_from_root[distance] = []
+
+                    queue.append((adjacent, distance + 1))
+                    self.distance_from_root[distance].append(adjacent)
 
+            closed.add(current)
+
+    @Graph.changes_version
     @recalculate_distance_to_root
     def set_root(self, node: DrawableNode):
         """Set a node as the root of the tree."""
@@ -903,6 +1365,9 @@ class DrawableGraph(Drawable, Graph):
     def add_node(self, node: DrawableNode):
         super().add_node(node)
 
+        node.grid = self.grid
+        self.grid.update(node, node.get_position())
+
     @recalculate_distance_to_root
     def remove_node(self, node, **kwargs):
         # check, if we're not removing the root; if we are, act accordingly
@@ -911,6 +1376,9 @@ class DrawableGraph(Drawable, Graph):
 
         super().remove_node(node, **kwargs)
 
+        self.grid.remove(node)
+        node.grid = None
+
     def deselect_all(self):
         """Deselect all nodes and vertices."""
         for node in self.get_nodes():
@@ -920,10 +1388,20 @@ class DrawableGraph(Drawable, Graph):
             self.deselect(vertex)
 
     def node_at_position(self, position: Vector) -> Optional[DrawableNode]:
-        """Returns a Node if there is one at the given position, else None."""
-        for node in self.get_nodes():
-            if position.distance(node.get_position()) <= 1:
-                return node
+        """Returns a Node if there is one at the given position, else None. If there
+        are more, the closest one is returned."""
+        # the distances are compared squared, so no square roots are needed
+        closest, closest_distance = None, 1
+        x, y = position
+
+        for node in self.grid.near(position):
+            nx, ny = node.get_position()
+            distance = (x - nx) * (x - nx) + (y - ny) * (y - ny)
+
+            if distance <= closest_distance:
+                closest, closest_distance = node, distance
+
+        return closest
 
     def get_distance_from_root(self) -> Dict[int, List[DrawableNode]]:
         """Return the resulting dictionary of a BFS ran from the root node."""
@@ -949,6 +1427,7 @@ class DrawableGraph(Drawable, Graph):
         for _, animation in self.animations:
             animation.resume()
 
+    @Graph.changes_version
     def clear_animations(self):
         """Clear all graph animations."""
         # clear animations
@@ -3,8 +3,9 @@
 from __future__ import annotations
 from typing import *
 
-from math import sqrt, sin, cos
+from math import sqrt, sin, cos, floor, hypot
 from dataclasses import *
+from collections import defaultdict
 
 
 Number = Union[int, float, complex]
@@ -13,10 +14,20 @@ Number = Union[int, float, complex]
 class Vector:
     """A Python implementation of a vector class and some of its operations."""
 
-    values: List[Number] = None
+    # vectors are created all the time (for each force, position, rotation...), so
+    # the instances only have the list of the values (and no __dict__)
+    __slots__ = ("values",)
 
     def __init__(self, *args):
-        self.values = list(args)
+        self.values: List[Number] = list(args)
+
+    @classmethod
+    def _from_list(cls, values: List[Number]) -> Vector:
+        """Create a vector from a list of components (without copying the list), which
+        is what the operators use, since they already have a new list."""
+        vector = cls.__new__(cls)
+        vector.values = values
+        return vector
 
     def __str__(self):
         """String representation of a vector is its components surrounded by < and >."""
@@ -40,53 +51,62 @@ class Vector:
     def __getitem__(self, i: int):
         return self.values[i]
 
+    def __iter__(self):
+        return iter(self.values)
+
     def __neg__(self):
-        return Vector(*iter(-component for component in self))
+        return Vector._from_list([-component for component in self.values])
 
     def __add__(self, other: Vector):
-        return Vector(*iter(u + v for u, v in zip(self, other)))
+        return Vector._from_list([u + v for u, v in zip(self.values, other)])
 
     __iadd__ = __add__
 
     def __sub__(self, other: Vector):
-        return self + (-other)
+        return Vector._from_list([u - v for u, v in zip(self.values, other)])
 
     __isub__ = __sub__
 
     def __mul__(self, other: Vector):
         """Defines scalar and dot product of a vector."""
         if type(other) in (int, float, complex):
-            return Vector(*iter(component * other for component in self))
+            return Vector._from_list([component * other for component in self.values])
         else:
-            return sum(u * v for u, v in zip(self, other))
+            return sum(u * v for u, v in zip(self.values, other))
 
     __rmul__ = __imul__ = __mul__
 
     def __truediv__(self, other: Number):
         """Defines vector division by a scalar."""
-        return Vector(*iter(component / other for component in self))
+        return Vector._from_list([component / other for component in self.values])
 
     def __floordiv__(self, other: Number):
         """Defines floor vector division by a scalar."""
-        return Vector(*iter(component // other for component in self))
+        return Vector._from_list([component // other for component in self.values])
 
     def magnitude(self):
         """Returns the magnitude of the vector."""
-        return sqrt(sum(component ** 2 for component in self))
+        # the vectors are almost always 2D, for which hypot is much faster (it only
+        # takes more than two arguments since Python 3.8)
+        if len(self.values) == 2:
+            return hypot(self.values[0], self.values[1])
+
+        return sqrt(sum(component * component for component in self.values))
 
     def rotated(self, angle: float, point: Vector = None):
         """Returns this vector rotated by an angle (in radians) around a certain point."""
+        # rotating around the origin doesn't need to translate the vector
         if point is None:
-            point = Vector(0, 0)
+            return self.__rotated(angle, self)
 
         return self.__rotated(angle, self - point) + point
 
     def __rotated(self, angle: float, vector: Vector):
         """Returns a vector rotated by an angle (in radians)."""
-        return Vector(
-            vector[0] * cos(angle) - vector[1] * sin(angle),
-            vector[0] * sin(angle) + vector[1] * cos(angle),
-        )
+        c, s = cos(angle), sin(angle)
+        x, y = vector
+
+        return Vector(x * c - y * s, x * s + y * c)
 
     def unit(self):
         """Returns a unit vector with the same direction as this vector."""
@@ -94,11 +114,12 @@ class Vector:
 
     def distance(self, other: Vector):
         """Returns the distance of two Vectors in space."""
-        return sqrt(sum(map(lambda x: sum(x) ** 2, zip(self, -other))))
+        # (summing a list is faster than a generator for the few components there are)
+        return sqrt(sum([(u - v) * (u - v) for u, v in zip(self.values, other)]))
 
     def repeat(self, n: int):
         """Performs sequence repetition on the vector (n times)."""
-        return Vector(*self.values * n)
+        return Vector._from_list(self.values * n)
 
     @classmethod
     def sum(cls, l: List[Vector]):
@@ -111,15 +132,71 @@ class Vector:
         return Vector.sum(l) / len(l)
 
 
+class Grid:
+    """A uniform grid of square cells for quickly finding objects near a point."""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+
+        # the objects in each of the cells and the cell of each of the objects
+        self.cells: Dict[Tuple[int, int], Set[Any]] = defaultdict(set)
+        self.objects: Dict[Any, Tuple[int, int]] = {}
+
+    def cell(self, point: Vector) -> Tuple[int, int]:
+        """Return the cell that the point is in."""
+        return (floor(point[0] / self.cell_size), floor(point[1] / self.cell_size))
+
+    def update(self, obj: Any, point: Vector):
+        """Add the object to the grid at the given point (moving it, if it's already
+        in the grid)."""
+        cell = self.cell(point)
+        previous = self.objects.get(obj)
+
+        if previous == cell:
+            return
+
+        if previous is not None:
+            self.__remove_from_cell(obj, previous)
+
+        self.cells[cell].add(obj)
+        self.objects[obj] = cell
+
+    def remove(self, obj: Any):
+        """Remove the object from the grid (if it's there)."""
+        cell = self.objects.pop(obj, None)
+
+        if cell is not None:
+            self.__remove_from_cell(obj, cell)
+
+    def __remove_from_cell(self, obj: Any, cell: Tuple[int, int]):
+        """Remove the object from the cell, removing the cell if it's empty."""
+        objects = self.cells[cell]
+        objects.discard(obj)
+
+        if len(objects) == 0:
+            del self.cells[cell]
+
+    def near(self, point: Vector) -> Iterator[Any]:
+        """Yield the objects in the cell of the point and in the cells around it (so
+        all objects closer than the size of a cell are found)."""
+        x, y = self.cell(point)
+
+        for i in range(x - 1, x + 2):
+            for j in range(y - 1, y + 2):
+                if (i, j) in self.cells:
+                    yield from self.cells[(i, j)]
+
+
 @dataclass
 class Transformation:
     """A class for working with the current transformation of the canvas."""
 
     canvas: QWidget  # get the widget so we can calculate the current width and height
 
-    # initial scale and transformation
+    # initial scale and transformation (the translation is changed in place, so each
+    # transformation needs a vector of its own)
     scale: float = 20
-    translation: float = Vector(0, 0)
+    translation: Vector = field(default_factory=lambda: Vector(0, 0))
 
     def transform_painter(self, painter: QPainter):
         """Translate the painter according to the current canvas state."""
@@ -138,12 +215,14 @@ class Transformation:
         """Move the transformation center closer to the given point. The closer to 1
         the value of center_smoothness, the faster the centering is. At 1, it is
         instant."""
-        middle = self.apply(Vector(self.canvas.width(), self.canvas.height()) / 2)
+        middle = self.apply(Vector(self.canvas.width() / 2, self.canvas.height() / 2))
         self.translation = self.inverse((middle - point) * center_smoothness)
 
     def translate(self, delta: Vector):
         """Translate the transformation by the vector delta delta."""
-        self.translation += delta * self.scale
+        # in place, since this is done on each mouse move when moving the canvas
+        self.translation[0] += delta[0] * self.scale
+        self.translation[1] += delta[1] * self.scale
 
     def zoom(self, position: Vector, delta: float):
         """Zoom in/out."""
@@ -152,4 +231,6 @@ class Transformation:
         self.scale *= 2 ** delta  # scale smoothly
 
         # adjust translation so the x and y of the mouse stay in the same spot
-        self.translation -= position * (self.scale - previous_scale)
+        difference = self.scale - previous_scale
+        self.translation[0] -= position[0] * difference
+        self.translation[1] -= position[1] * difference